@@ -0,0 +1,102 @@
+# authorization.py
+"""Authorization checks for room commands
+
+Permissions are checked live, as ctx.author already contains the current roles of the member.
+Whether a member owns a room needs the database, so these decisions are cached per (channel, member) and
+repeated and denied calls don't need the database.
+The cache is invalidated when a room owner changes, rooms are imported or a channel is deleted. Decisions also
+expire after settings.AUTHORIZATION_CACHE_TTL seconds, in case the database is changed from outside the bot.
+Expired decisions are removed when they are read and in a sweep at most once per TTL, so the cache only holds
+decisions made within the last two TTLs.
+"""
+
+import time
+from typing import Optional
+
+import discord
+
+import database
+from resources import settings
+
+
+_decisions: dict[int, dict[int, tuple[bool, float]]] = {} # channel_id: {member_id: (is_owner, expires_at)}
+_next_eviction = 0.0 # time.monotonic() of the next sweep over all decisions
+
+
+async def can_manage_room(ctx: discord.ApplicationContext,
+                          channel: Optional[discord.abc.GuildChannel] = None) -> tuple[bool, Optional[database.Room]]:
+    """Checks if the author is allowed to manage a room.
+    This is the case if they have the permission manage_channels in the room or if they are the room owner.
+    The permission is always checked live, only the owner check is cached.
+
+    Arguments
+    ---------
+    ctx: Context.
+    channel: The room to check. Defaults to ctx.channel.
+
+    Returns
+    -------
+    Tuple (allowed, room). allowed is True if allowed, False if not. room is the Room if it was read from
+    the database for this check, None otherwise.
+
+    Raises
+    ------
+    sqlite3.Error if something happened within the database.
+    LookupError if something goes wrong reading the room.
+    """
+    if channel is None:
+        channel = ctx.channel
+    if channel.permissions_for(ctx.author).manage_channels:
+        return True, None
+    channel_decisions = _decisions.get(channel.id)
+    if channel_decisions is not None:
+        decision = channel_decisions.get(ctx.author.id)
+        if decision is not None:
+            is_owner, expires_at = decision
+            if expires_at > time.monotonic():
+                return is_owner, None
+            _remove_decision(channel.id, ctx.author.id)
+    room_settings: database.Room = await database.get_room(ctx, channel.id)
+    is_owner = room_settings.owner_id == ctx.author.id
+    _store_decision(channel.id, ctx.author.id, is_owner)
+    return is_owner, room_settings
+
+
+def _store_decision(channel_id: int, member_id: int, is_owner: bool) -> None:
+    """Caches a decision. Every settings.AUTHORIZATION_CACHE_TTL seconds, all expired decisions are removed."""
+    global _next_eviction
+    now = time.monotonic()
+    if now >= _next_eviction:
+        _evict_expired(now)
+        _next_eviction = now + settings.AUTHORIZATION_CACHE_TTL
+    _decisions.setdefault(channel_id, {})[member_id] = (is_owner, now + settings.AUTHORIZATION_CACHE_TTL)
+
+
+def _remove_decision(channel_id: int, member_id: int) -> None:
+    """Removes a cached decision and the channel entry if it is empty"""
+    channel_decisions = _decisions.get(channel_id)
+    if channel_decisions is None:
+        return
+    channel_decisions.pop(member_id, None)
+    if not channel_decisions:
+        del _decisions[channel_id]
+
+
+def _evict_expired(now: float) -> None:
+    """Removes all expired decisions"""
+    for channel_id, channel_decisions in list(_decisions.items()):
+        for member_id, (_, expires_at) in list(channel_decisions.items()):
+            if expires_at <= now:
+                del channel_decisions[member_id]
+        if not channel_decisions:
+            del _decisions[channel_id]
+
+
+def invalidate_channel(channel_id: int) -> None:
+    """Removes all cached decisions for a channel"""
+    _decisions.pop(channel_id, None)
+
+
+def clear() -> None:
+    """Removes all cached decisions"""
+    _decisions.clear()
@@ -0,0 +1,120 @@
+# room_decoding.py
+"""Benchmark: decoding rooms records into Room objects, before and after database version 1
+
+Creates two temporary file-backed databases with the same rooms, one with the old schema (ISO DATETIME
+strings, rowid table) and one with the current schema, and fully scans both into Room objects.
+Both connections are opened like database.init_database() opens the bot database.
+Each scan runs once to warm the page cache, the best of the following runs is reported.
+
+Usage:
+    python benchmarks/room_decoding.py [row_count] [runs]
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from resources import settings
+
+
+@dataclass()
+class OldRoom():
+    """Room before database version 1"""
+    channel_id: int
+    edit_count: int
+    last_edit_at: datetime
+    owner_id: int
+
+
+def scan_old(connection: sqlite3.Connection) -> list:
+    """Decodes like get_room did before database version 1"""
+    cur = connection.cursor()
+    cur.row_factory = sqlite3.Row
+    cur.execute('SELECT * FROM rooms')
+    return [
+        OldRoom(
+            channel_id = record['channel_id'],
+            edit_count = record['edit_count'],
+            last_edit_at = datetime.fromisoformat(record['last_edit_at']),
+            owner_id = record['owner_id'],
+        )
+        for record in cur
+    ]
+
+
+def scan_new(connection: sqlite3.Connection) -> list:
+    """Decodes like get_room does now"""
+    cur = connection.cursor()
+    cur.execute(f'SELECT {database.ROOM_COLUMNS} FROM rooms')
+    return [database._room_from_record(record) for record in cur]
+
+
+def measure(scan, connection: sqlite3.Connection, runs: int) -> tuple[float, float]:
+    """Returns rows per second (best run, warm cache) and bytes per decoded room"""
+    row_count = len(scan(connection))
+    best = min(_timed(scan, connection) for _ in range(runs))
+    tracemalloc.start()
+    rooms = scan(connection)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del rooms
+    return row_count / best, memory / row_count
+
+
+def _timed(scan, connection: sqlite3.Connection) -> float:
+    start_time = time.perf_counter()
+    scan(connection)
+    return time.perf_counter() - start_time
+
+
+def main() -> None:
+    global database
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # database opens the log file on import, so it goes to a scratch file
+        settings.BOT_DIR = temp_dir
+        os.makedirs(os.path.join(temp_dir, 'logs'))
+        import database
+
+        old_db_file = os.path.join(temp_dir, 'old.db')
+        new_db_file = os.path.join(temp_dir, 'new.db')
+        old_db = sqlite3.connect(old_db_file, isolation_level=None, detect_types=sqlite3.PARSE_DECLTYPES)
+        old_db.execute(
+            'CREATE TABLE rooms (channel_id INTEGER PRIMARY KEY UNIQUE NOT NULL, owner_id INTEGER, '
+            'last_edit_at DATETIME, edit_count INTEGER NOT NULL DEFAULT (0))'
+        )
+        old_db.execute('BEGIN')
+        old_db.executemany(
+            'INSERT INTO rooms (channel_id, owner_id, last_edit_at, edit_count) VALUES (?, ?, ?, ?)',
+            (
+                (channel_id, None if channel_id % 3 else channel_id * 7, '2024-01-02 03:04:05', channel_id % 3)
+                for channel_id in range(row_count)
+            )
+        )
+        old_db.execute('COMMIT')
+        old_db.execute(f"VACUUM INTO '{new_db_file}'")
+        new_db = sqlite3.connect(new_db_file, isolation_level=None, detect_types=sqlite3.PARSE_DECLTYPES)
+        database.migrate_database(new_db)
+        new_db.execute('VACUUM')
+
+        print(f'CPython {sys.version.split()[0]}, SQLite {sqlite3.sqlite_version}, {row_count:,} rooms, '
+              f'file-backed, warm cache, best of {runs} runs')
+        for name, scan, connection, db_file in (('before', scan_old, old_db, old_db_file),
+                                                ('after', scan_new, new_db, new_db_file)):
+            rows_per_second, bytes_per_room = measure(scan, connection, runs)
+            print(f'{name:>6}: {rows_per_second:,.0f} rows/s, {bytes_per_room:,.0f} bytes per Room, '
+                  f'{os.path.getsize(db_file) / 1_000_000:.1f} MB database file')
+        old_db.close()
+        new_db.close()
+
+
+if __name__ == '__main__':
+    main()
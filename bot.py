@@ -1,6 +1,8 @@
 # bot.py
 
 import discord
+import database
+import lifecycle
 from resources import settings
 
 from discord.ext import commands
@@ -28,4 +30,7 @@ if __name__ == '__main__':
     for extension in EXTENSIONS:
         bot.load_extension(extension)
 
+database.init_database()
+lifecycle.setup(bot)
+
 bot.run(settings.TOKEN)
\ No newline at end of file
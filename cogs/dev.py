@@ -1,14 +1,24 @@
 # dev.py
 """Contains internal dev commands"""
 
+import asyncio
 import importlib
+import os
+import sqlite3
 import sys
+import time
 
 import discord
 from discord.commands import SlashCommandGroup, Option
 from discord.ext import commands
 
-from resources import settings, views
+import authorization
+import database
+import lifecycle
+from resources import exceptions, settings, views
+
+
+PROGRESS_INTERVAL = 2 # Seconds between progress message edits during exports and imports
 
 
 class DevCog(commands.Cog):
@@ -69,11 +79,74 @@ class DevCog(commands.Cog):
         if view.value is None:
             await message.edit(f'**{ctx.author.name}**, you didn\'t answer in time.')
         elif view.value == 'confirm':
-            await message.edit('Shutting down.')
-            await self.bot.close()
+            await message.edit('Shutting down. Waiting for in-flight work...')
+            if not await lifecycle.shutdown(self.bot, message):
+                await message.edit('The bot is already shutting down.')
         else:
             await message.edit('Shutdown aborted.')
 
+    @dev.command(name='export')
+    async def export_data(
+        self,
+        ctx: discord.ApplicationContext,
+        table: Option(str, 'Table to export', choices=database.TRANSFER_TABLES),
+        file_name: Option(str, 'File in the export folder, e.g. rooms.jsonl.gz or errors.csv.gz'),
+    ) -> None:
+        """Exports a table to a JSON Lines or CSV file without stopping the bot"""
+        os.makedirs(settings.EXPORT_DIR, exist_ok=True)
+        await run_transfer(ctx, database.export_table, 'Export', table, file_name)
+
+    @dev.command(name='import')
+    async def import_data(
+        self,
+        ctx: discord.ApplicationContext,
+        table: Option(str, 'Table to import into', choices=database.TRANSFER_TABLES),
+        file_name: Option(str, 'File in the export folder, e.g. rooms.jsonl.gz or errors.csv.gz (errors are appended)'),
+    ) -> None:
+        """Imports a table from a JSON Lines or CSV file without stopping the bot. Errors are appended."""
+        try:
+            await run_transfer(ctx, database.import_table, 'Import', table, file_name)
+        finally:
+            # Chunks before a failed one stay imported, so the cache has to be cleared either way
+            if table == 'rooms':
+                authorization.clear()
+
+
+async def run_transfer(ctx: discord.ApplicationContext, function, action: str, table: str, file_name: str) -> None:
+    """Runs database.export_table or database.import_table with lifecycle.run_blocking() and reports the progress"""
+    file_path = os.path.join(settings.EXPORT_DIR, os.path.basename(file_name))
+    await ctx.respond(f'{action}ing `{table}` (`{file_path}`)...')
+    message = await ctx.interaction.original_message()
+    loop = asyncio.get_running_loop()
+    last_update = time.monotonic()
+    last_row_count = 0
+
+    def report_progress(row_count: int) -> None:
+        """Edits the message with the current row count. Called from the executor thread."""
+        nonlocal last_update, last_row_count
+        last_row_count = row_count
+        if time.monotonic() - last_update < PROGRESS_INTERVAL:
+            return
+        last_update = time.monotonic()
+        asyncio.run_coroutine_threadsafe(
+            message.edit(content=f'{action}ing `{table}` (`{file_path}`)... {row_count:,} rows'), loop
+        )
+
+    start_time = time.monotonic()
+    try:
+        row_count = await lifecycle.run_blocking(
+            function, table, file_path, progress=report_progress, stop=lifecycle.stop_event
+        )
+    except (ValueError, OSError, sqlite3.Error, exceptions.TransferStoppedError) as error:
+        if action == 'Import':
+            result = f'{last_row_count:,} rows were imported before the error.'
+        else:
+            result = 'No file was written.'
+        await message.edit(content=f'{action} of `{table}` (`{file_path}`) failed: {error}\n{result}')
+        return
+    duration = time.monotonic() - start_time
+    await message.edit(content=f'{action}ed {row_count:,} rows of `{table}` (`{file_path}`) in {duration:.1f}s.')
+
 
 # Initialization
 def setup(bot):
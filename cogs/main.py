@@ -8,7 +8,7 @@ from discord.commands import slash_command
 from discord.ext import commands
 
 import database
-from resources import emojis, logs, settings
+from resources import emojis, exceptions, logs, settings
 
 
 class MainCog(commands.Cog):
@@ -50,6 +50,8 @@ class MainCog(commands.Cog):
         error = getattr(error, 'original', error)
         if isinstance(error, (commands.CommandNotFound, commands.NotOwner)):
             return
+        elif isinstance(error, exceptions.ShuttingDownError):
+            await ctx.respond('I\'m restarting right now, please try again in a minute.', ephemeral=True)
         elif isinstance(error, commands.DisabledCommand):
             await ctx.respond(f'Command `{ctx.command.qualified_name}` is temporarily disabled.', ephemeral=True)
         elif isinstance(error, (commands.MissingPermissions, commands.MissingRequiredArgument,
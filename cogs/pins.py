@@ -5,6 +5,8 @@ import discord
 from discord.commands import message_command
 from discord.ext import commands
 
+import lifecycle
+
 
 class PinsCog(commands.Cog):
     """Cog with events and commands to pin and unpin messages"""
@@ -34,6 +36,8 @@ class PinsCog(commands.Cog):
     @commands.Cog.listener()
     @commands.bot_has_permissions(send_messages=True, read_message_history=True, manage_messages=True)
     async def on_raw_reaction_add(self, event):
+        if not lifecycle.accept_work():
+            return
         await self.bot.wait_until_ready()
         channel = self.bot.get_channel(event.channel_id)
         message = await channel.fetch_message(event.message_id)
@@ -43,6 +47,8 @@ class PinsCog(commands.Cog):
     @commands.Cog.listener()
     @commands.bot_has_permissions(send_messages=True, read_message_history=True, manage_messages=True)
     async def on_raw_reaction_remove(self, event):
+        if not lifecycle.accept_work():
+            return
         await self.bot.wait_until_ready()
         channel = self.bot.get_channel(event.channel_id)
         message = await channel.fetch_message(event.message_id)
@@ -6,6 +6,7 @@ import discord
 from discord.commands import Option, SlashCommandGroup
 from discord.ext import commands
 
+import authorization
 import database
 
 
@@ -61,6 +62,7 @@ class RoomsCog(commands.Cog):
             return
         room_settings: database.Room = await database.get_room(ctx, room.id)
         await room_settings.update(ctx, owner_id=owner.id)
+        authorization.invalidate_channel(room.id)
         await ctx.respond(f'Done. **{owner.name}** is now the new owner of the room `{room.name}`.')
 
     @get_setting_room.command(name='owner')
@@ -83,6 +85,7 @@ class RoomsCog(commands.Cog):
         """Set the owner of a room"""
         room_settings: database.Room = await database.get_room(ctx, room.id)
         await room_settings.update(ctx, owner_id=None)
+        authorization.invalidate_channel(room.id)
         if room_settings.owner_id is None:
             await ctx.respond('Done. This room doesn\'t have an owner set anymore.')
         else:
@@ -96,11 +99,12 @@ class RoomsCog(commands.Cog):
         text: Option(str, 'The new name or topic')
     ) -> None:
         """Renames the name or topic of a room. Please note that you can only do 2 changes every 10 minutes."""
-        user_permissions = ctx.channel.permissions_for(ctx.author)
-        room_settings: database.Room = await database.get_room(ctx, ctx.channel.id)
-        if not user_permissions.manage_channels and room_settings.owner_id != ctx.author.id:
+        allowed, room_settings = await authorization.can_manage_room(ctx)
+        if not allowed:
             await ctx.respond(f'Sorry **{ctx.author.name}**, you are not allowed to rename this room.')
             return
+        if room_settings is None:
+            room_settings = await database.get_room(ctx, ctx.channel.id)
         if field == 'Name' and len(text) > 100:
             await ctx.respond(f'Sorry **{ctx.author.name}**, a room name is limited to 100 characters.')
             return
@@ -126,6 +130,11 @@ class RoomsCog(commands.Cog):
         await room_settings.update(ctx, edit_count=edit_count, last_edit_at=datetime.utcnow().replace(microsecond=0))
         await ctx.respond(f'The room {field.lower()} has been updated.')
 
+    # Events
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel) -> None:
+        """Removes cached authorization decisions of deleted channels"""
+        authorization.invalidate_channel(channel.id)
 
 # Initialization
 def setup(bot):
@@ -1,27 +1,43 @@
 # database.py
 """Access to the database"""
 
+import calendar
+import csv
 from dataclasses import dataclass
 from datetime import date, datetime
+import gzip
+import itertools
+import json
+import os
+import pathlib
 import sqlite3
-from typing import Optional, Union
+import threading
+from typing import Callable, Iterator, Optional, TextIO, Union
 
 import discord
 
 from resources import exceptions, logs, settings
 
 
-PINBOT_DB = sqlite3.connect(settings.DB_FILE, isolation_level=None, detect_types=sqlite3.PARSE_DECLTYPES)
+PINBOT_DB: Optional[sqlite3.Connection] = None # Set by init_database()
 
 
 INTERNAL_ERROR_SQLITE3 = 'Error executing SQL.\nError: {error}\nTable: {table}\nFunction: {function}\SQL: {sql}'
 INTERNAL_ERROR_LOOKUP = 'Error assigning values.\nError: {error}\nTable: {table}\nFunction: {function}\Records: {record}'
 INTERNAL_ERROR_NO_ARGUMENTS = 'You need to specify at least one keyword argument.\nTable: {table}\nFunction: {function}'
 
+TRANSFER_TABLES = ('rooms', 'errors')
+TRANSFER_CHUNK_SIZE = 10_000
+
+ROOM_COLUMNS = 'channel_id, edit_count, last_edit_at, owner_id' # Order of the Room fields
+
 
 @dataclass()
 class Room():
-    """Object that represents a record of the table "rooms"."""
+    """Object that represents a record of the table "rooms".
+    Uses __slots__ instead of a per-instance __dict__, as rooms are read a lot.
+    """
+    __slots__ = ('channel_id', 'edit_count', 'last_edit_at', 'owner_id')
     channel_id: int
     edit_count: int
     last_edit_at: datetime
@@ -96,6 +112,123 @@ async def log_error(error: Union[Exception, str], ctx: Optional[discord.Applicat
         raise
 
 
+# --- Database: Setup ---
+def migrate_database(connection: sqlite3.Connection) -> None:
+    """Brings the database schema up to date. The current version is stored in PRAGMA user_version.
+
+    Version 1: rooms is a WITHOUT ROWID table keyed on channel_id and last_edit_at is stored as
+    integer epoch seconds (UTC) instead of an ISO DATETIME string.
+
+    Raises
+    ------
+    sqlite3.Error if something happened within the database. The migration is rolled back.
+    Also logs all errors to the log file.
+    """
+    table = 'rooms'
+    function_name = 'migrate_database'
+    sql = 'PRAGMA user_version'
+    try:
+        cur = connection.cursor()
+        cur.execute(sql)
+        if cur.fetchone()[0] >= 1:
+            return
+        cur.execute('BEGIN IMMEDIATE')
+        try:
+            sql = (
+                f'CREATE TABLE {table}_new (channel_id INTEGER PRIMARY KEY NOT NULL, owner_id INTEGER, '
+                f'last_edit_at INTEGER NOT NULL DEFAULT (0), edit_count INTEGER NOT NULL DEFAULT (0)) WITHOUT ROWID'
+            )
+            cur.execute(sql)
+            sql = (
+                f'INSERT INTO {table}_new (channel_id, owner_id, last_edit_at, edit_count) '
+                f'SELECT channel_id, owner_id, COALESCE(CAST(strftime(\'%s\', last_edit_at) AS INTEGER), 0), '
+                f'edit_count FROM {table}'
+            )
+            cur.execute(sql)
+            sql = f'DROP TABLE {table}'
+            cur.execute(sql)
+            sql = f'ALTER TABLE {table}_new RENAME TO {table}'
+            cur.execute(sql)
+            sql = 'PRAGMA user_version = 1'
+            cur.execute(sql)
+        except:
+            cur.execute('ROLLBACK')
+            raise
+        cur.execute('COMMIT')
+    except sqlite3.Error as error:
+        logs.logger.error(INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql))
+        raise
+
+
+def init_database() -> None:
+    """Connects to the bot database, enables WAL mode and brings the schema up to date.
+    Has to be called once before the bot starts. Export and import don't need this.
+
+    Raises
+    ------
+    sqlite3.Error if something happened within the database.
+    """
+    global PINBOT_DB
+    PINBOT_DB = sqlite3.connect(settings.DB_FILE, isolation_level=None, detect_types=sqlite3.PARSE_DECLTYPES)
+    PINBOT_DB.execute('PRAGMA journal_mode=WAL') # Lets exports read a snapshot while the bot keeps writing
+    migrate_database(PINBOT_DB)
+
+
+def _connect_existing(db_file: str, **kwargs) -> sqlite3.Connection:
+    """Connects to an existing database file. Unlike sqlite3.connect(), doesn't create a missing file.
+
+    Arguments
+    ---------
+    db_file: The database file.
+    kwargs: Passed on to sqlite3.connect().
+
+    Raises
+    ------
+    FileNotFoundError if the file doesn't exist.
+    """
+    if not os.path.isfile(db_file):
+        raise FileNotFoundError(f'Database file not found: {db_file}')
+    return sqlite3.connect(f'{pathlib.Path(db_file).resolve().as_uri()}?mode=rw', uri=True, **kwargs)
+
+
+def close_database() -> None:
+    """Commits pending writes, checkpoints the WAL into the database file and closes the database.
+    Errors and incomplete checkpoints are logged to the log file only, the database is closed regardless.
+    """
+    table = 'N/A'
+    function_name = 'close_database'
+    sql = 'PRAGMA wal_checkpoint(TRUNCATE)'
+    try:
+        if PINBOT_DB.in_transaction:
+            PINBOT_DB.commit()
+        busy, wal_pages, checkpointed_pages = PINBOT_DB.execute(sql).fetchone()
+        if busy or checkpointed_pages < wal_pages:
+            logs.logger.warning(
+                f'WAL checkpoint incomplete (busy: {busy}), {checkpointed_pages} of {wal_pages} pages '
+                f'checkpointed. The rest stays in the WAL and is recovered on the next start.'
+            )
+    except sqlite3.Error as error:
+        logs.logger.error(INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql))
+    finally:
+        PINBOT_DB.close()
+
+
+# --- Conversions ---
+def to_epoch(value: Union[datetime, str, int]) -> int:
+    """Converts a naive UTC datetime, an ISO string or a string of digits to integer epoch seconds"""
+    if isinstance(value, str):
+        value = int(value) if value.isdigit() else datetime.fromisoformat(value)
+    if isinstance(value, datetime):
+        return calendar.timegm(value.utctimetuple())
+    return value
+
+
+def _room_from_record(record: tuple) -> Room:
+    """Creates a Room from a plain tuple record with the columns in ROOM_COLUMNS order"""
+    channel_id, edit_count, last_edit_at, owner_id = record
+    return Room(channel_id, edit_count, datetime.utcfromtimestamp(last_edit_at), owner_id)
+
+
 # --- Database: Get Data ---
 async def get_room(ctx: discord.ApplicationContext, channel_id: int) -> Room:
     """Gets the settings of a room. If the room doesn't exist, a new record is created.
@@ -113,18 +246,15 @@ async def get_room(ctx: discord.ApplicationContext, channel_id: int) -> Room:
     """
     table = 'rooms'
     function_name = 'get_room'
-    sql = f'SELECT * FROM {table} WHERE channel_id=?'
+    sql = f'SELECT {ROOM_COLUMNS} FROM {table} WHERE channel_id=?'
     try:
         cur = PINBOT_DB.cursor()
-        cur.row_factory = sqlite3.Row
         cur.execute(sql, (channel_id,))
         record = cur.fetchone()
         if not record:
-            sql = f'INSERT INTO {table} (channel_id, last_edit_at) VALUES (?, ?)'
-            cur.execute(sql, (channel_id, datetime.utcnow().replace(microsecond=0)))
-            sql = f'SELECT * FROM {table} WHERE channel_id=?'
-            cur.execute(sql, (channel_id,))
-            record = cur.fetchone()
+            sql = f'INSERT INTO {table} ({ROOM_COLUMNS}) VALUES (?, ?, ?, ?)'
+            record = (channel_id, 0, to_epoch(datetime.utcnow()), None)
+            cur.execute(sql, record)
     except sqlite3.Error as error:
         await log_error(
             INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql),
@@ -132,12 +262,7 @@ async def get_room(ctx: discord.ApplicationContext, channel_id: int) -> Room:
         )
         raise
     try:
-        channel_settings = Room(
-            channel_id = record['channel_id'],
-            edit_count = record['edit_count'],
-            last_edit_at = datetime.fromisoformat(record['last_edit_at']),
-            owner_id = record['owner_id'],
-        )
+        channel_settings = _room_from_record(record)
     except Exception as error:
         await log_error(
             INTERNAL_ERROR_LOOKUP.format(error=error, table=table, function=function_name, record=record),
@@ -183,6 +308,8 @@ async def _update_room(ctx: discord.ApplicationContext, channel_id: int, **kwarg
         for kwarg in kwargs:
             sql = f'{sql} {kwarg} = :{kwarg},'
         sql = sql.strip(",")
+        if 'last_edit_at' in kwargs:
+            kwargs['last_edit_at'] = to_epoch(kwargs['last_edit_at'])
         kwargs['channel_id_old'] = channel_id
         sql = f'{sql} WHERE channel_id = :channel_id_old'
         cur.execute(sql, kwargs)
@@ -191,4 +318,220 @@ async def _update_room(ctx: discord.ApplicationContext, channel_id: int, **kwarg
             INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql),
             ctx
         )
-        raise
\ No newline at end of file
+        raise
+
+# --- Database: Export/Import ---
+def _get_transfer_format(file_path: str) -> str:
+    """Returns the transfer format ("jsonl" or "csv") from the file name.
+    Both formats can be gzip compressed by adding ".gz".
+
+    Raises
+    ------
+    ValueError if the file extension is not supported.
+    """
+    file_name = file_path.lower()
+    if file_name.endswith('.gz'):
+        file_name = file_name[:-3]
+    for file_format in ('jsonl', 'csv'):
+        if file_name.endswith(f'.{file_format}'):
+            return file_format
+    raise ValueError(f'Unsupported file type: {file_path}. Use .jsonl, .csv, .jsonl.gz or .csv.gz.')
+
+
+def _open_transfer_file(file_path: str, mode: str, compressed: bool) -> TextIO:
+    """Opens an export file in text mode"""
+    if compressed:
+        return gzip.open(file_path, f'{mode}t', compresslevel=6, encoding='utf-8', newline='')
+    return open(file_path, mode, encoding='utf-8', newline='')
+
+
+def export_table(table: str, file_path: str, db_file: str = settings.DB_FILE,
+                 progress: Optional[Callable[[int], None]] = None,
+                 stop: Optional[threading.Event] = None) -> int:
+    """Streams all records of a table into a JSON Lines or CSV file (see _get_transfer_format).
+    All records are read from the same snapshot, so the bot can keep writing while this runs.
+    Memory usage is constant, records are fetched in chunks of TRANSFER_CHUNK_SIZE.
+
+    This is blocking. Run it in an executor if called from the bot.
+
+    Arguments
+    ---------
+    table: One of TRANSFER_TABLES.
+    file_path: The file to write. Is only created once the export is complete.
+    db_file: The database to export from.
+    progress: Called with the amount of exported records after every chunk.
+    stop: If given and set, the transfer stops before the next chunk.
+
+    Returns
+    -------
+    Amount of exported records.
+
+    Raises
+    ------
+    sqlite3.Error if something happened within the database.
+    ValueError if the table or the file type is not supported.
+    exceptions.TransferStoppedError if stop was set. The file is not written.
+    OSError if the file can't be written or the database file doesn't exist.
+    Also logs all database errors to the log file.
+    """
+    function_name = 'export_table'
+    if table not in TRANSFER_TABLES:
+        raise ValueError(f'Table {table} can not be exported.')
+    file_format = _get_transfer_format(file_path)
+    sql = f'SELECT * FROM {table}'
+    temp_file_path = f'{file_path}.part'
+    row_count = 0
+    connection = _connect_existing(db_file, isolation_level=None)
+    try:
+        cur = connection.cursor()
+        cur.execute('BEGIN')
+        cur.execute(sql)
+        columns = [column[0] for column in cur.description]
+        json_encoder = json.JSONEncoder(ensure_ascii=False)
+        with _open_transfer_file(temp_file_path, 'w', file_path.lower().endswith('.gz')) as export_file:
+            if file_format == 'csv':
+                writer = csv.writer(export_file)
+                writer.writerow(columns)
+            while True:
+                if stop is not None and stop.is_set():
+                    raise exceptions.TransferStoppedError(f'Stopped after {row_count:,} records, no file was written.')
+                records = cur.fetchmany(TRANSFER_CHUNK_SIZE)
+                if not records:
+                    break
+                if file_format == 'csv':
+                    writer.writerows(records)
+                else:
+                    export_file.writelines(
+                        f'{json_encoder.encode(dict(zip(columns, record)))}\n' for record in records
+                    )
+                row_count += len(records)
+                if progress is not None:
+                    progress(row_count)
+        cur.execute('COMMIT')
+        os.replace(temp_file_path, file_path)
+    except sqlite3.Error as error:
+        logs.logger.error(INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql))
+        raise
+    finally:
+        connection.close()
+        if os.path.isfile(temp_file_path):
+            os.remove(temp_file_path)
+
+    return row_count
+
+
+def _read_transfer_file(import_file: TextIO, file_format: str) -> tuple[list[str], Iterator[tuple]]:
+    """Returns the columns and a lazy iterator over the records of an export file.
+    Empty CSV values are read as NULL.
+
+    Raises
+    ------
+    ValueError if the file is empty or a record doesn't match the columns.
+    """
+    if file_format == 'csv':
+        reader = csv.reader(import_file)
+        columns = next(reader, None)
+        if not columns:
+            raise ValueError('The file is empty.')
+        records = (tuple(value if value != '' else None for value in row) for row in reader)
+        return columns, records
+
+    lines = (line for line in import_file if line.strip())
+    first_line = next(lines, None)
+    if first_line is None:
+        raise ValueError('The file is empty.')
+    columns = list(json.loads(first_line))
+
+    def records() -> Iterator[tuple]:
+        for line in itertools.chain((first_line,), lines):
+            record = json.loads(line)
+            try:
+                yield tuple(record[column] for column in columns)
+            except KeyError as error:
+                raise ValueError(f'Record is missing column {error}: {line.strip()}') from error
+
+    return columns, records()
+
+
+def import_table(table: str, file_path: str, db_file: str = settings.DB_FILE,
+                 progress: Optional[Callable[[int], None]] = None,
+                 stop: Optional[threading.Event] = None) -> int:
+    """Streams records from a JSON Lines or CSV file (see _get_transfer_format) into a table.
+    Existing rooms with the same channel_id are replaced, so importing rooms again is safe.
+    The errors table has no key, so errors are always appended. Importing the same errors file twice
+    duplicates every record.
+    Records are written in chunks of TRANSFER_CHUNK_SIZE, each chunk in its own transaction, so the
+    bot is only blocked for the duration of one chunk and memory usage stays constant.
+
+    This is blocking. Run it in an executor if called from the bot.
+
+    Arguments
+    ---------
+    table: One of TRANSFER_TABLES.
+    file_path: The file to read.
+    db_file: The database to import into.
+    progress: Called with the amount of imported records after every chunk.
+    stop: If given and set, the transfer stops before the next chunk.
+
+    Returns
+    -------
+    Amount of imported records.
+
+    Raises
+    ------
+    sqlite3.Error if something happened within the database. The chunk that failed is rolled back,
+    all chunks before it stay imported.
+    ValueError if the table, the file type or the file contents are not supported.
+    exceptions.TransferStoppedError if stop was set. All chunks before it stay imported.
+    OSError if the file can't be read or the database file doesn't exist.
+    Also logs all database errors to the log file.
+    """
+    function_name = 'import_table'
+    if table not in TRANSFER_TABLES:
+        raise ValueError(f'Table {table} can not be imported.')
+    file_format = _get_transfer_format(file_path)
+    sql = f'PRAGMA table_info({table})'
+    row_count = 0
+    connection = _connect_existing(db_file, isolation_level=None, timeout=30)
+    try:
+        migrate_database(connection)
+        cur = connection.cursor()
+        table_columns = [column[1] for column in cur.execute(sql)]
+        with _open_transfer_file(file_path, 'r', file_path.lower().endswith('.gz')) as import_file:
+            columns, records = _read_transfer_file(import_file, file_format)
+            unknown_columns = set(columns) - set(table_columns)
+            if unknown_columns:
+                raise ValueError(f'Unknown columns for table {table}: {", ".join(sorted(unknown_columns))}')
+            if table == 'rooms' and 'last_edit_at' in columns:
+                # Exports from before database version 1 contain ISO strings
+                index = columns.index('last_edit_at')
+                records = (
+                    (*record[:index], to_epoch(record[index]), *record[index + 1:]) for record in records
+                )
+            sql = (
+                f'INSERT OR REPLACE INTO {table} ({", ".join(columns)}) '
+                f'VALUES ({", ".join("?" * len(columns))})'
+            )
+            while True:
+                if stop is not None and stop.is_set():
+                    raise exceptions.TransferStoppedError(f'Stopped after {row_count:,} imported records.')
+                chunk = list(itertools.islice(records, TRANSFER_CHUNK_SIZE))
+                if not chunk:
+                    break
+                cur.execute('BEGIN IMMEDIATE')
+                try:
+                    cur.executemany(sql, chunk)
+                except:
+                    cur.execute('ROLLBACK')
+                    raise
+                cur.execute('COMMIT')
+                row_count += len(chunk)
+                if progress is not None:
+                    progress(row_count)
+    except sqlite3.Error as error:
+        logs.logger.error(INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql))
+        raise
+    finally:
+        connection.close()
+
+    return row_count
@@ -0,0 +1,156 @@
+# lifecycle.py
+"""Graceful shutdown of the bot
+
+Commands and event handlers register their task with accept_work(). Blocking work runs with run_blocking().
+On shutdown (/dev shutdown, SIGTERM or SIGINT), no new work is accepted, registered tasks are drained until
+settings.SHUTDOWN_TIMEOUT, blocking work is stopped, pending database writes are flushed and the database is
+checkpointed and closed before the bot is closed.
+"""
+
+import asyncio
+import functools
+import signal
+import threading
+import time
+from typing import Any, Callable, Optional
+
+import discord
+from discord.ext import commands
+
+import database
+from resources import exceptions, logs, settings
+
+
+_accepting = True
+_in_flight: set[asyncio.Task] = set()
+_blocking: set[asyncio.Future] = set()
+stop_event = threading.Event() # Set on shutdown, blocking work should stop when this is set
+_shutdown_task: Optional[asyncio.Task] = None
+_signal_count = 0
+
+
+def accept_work() -> bool:
+    """Registers the current task as in-flight work that is drained on shutdown.
+    The task is unregistered automatically once it is done.
+
+    Returns
+    -------
+    True if the work can start, False if the bot is shutting down.
+    """
+    if not _accepting:
+        return False
+    task = asyncio.current_task()
+    if task is not None and task not in _in_flight:
+        _in_flight.add(task)
+        task.add_done_callback(_in_flight.discard)
+    return True
+
+
+async def check_accepting(ctx: discord.ApplicationContext) -> bool:
+    """Global command check. Registers the command as in-flight work.
+
+    Raises
+    ------
+    exceptions.ShuttingDownError if the bot is shutting down.
+    """
+    if not accept_work():
+        raise exceptions.ShuttingDownError('The bot is shutting down.')
+    return True
+
+
+async def run_blocking(function: Callable, *args, **kwargs) -> Any:
+    """Runs blocking work in the default executor and returns its result.
+    Shutdown waits for the work before closing the database, even if the calling task is cancelled.
+    Long running work should take stop_event and stop when it is set.
+    """
+    future = asyncio.get_running_loop().run_in_executor(None, functools.partial(function, *args, **kwargs))
+    _blocking.add(future)
+    future.add_done_callback(_blocking_done)
+    return await asyncio.shield(future)
+
+
+def _blocking_done(future: asyncio.Future) -> None:
+    """Unregisters finished blocking work. Retrieves the exception, as the caller may be cancelled already."""
+    _blocking.discard(future)
+    if not future.cancelled():
+        future.exception()
+
+
+async def shutdown(bot: commands.Bot, message: Optional[discord.Message] = None) -> bool:
+    """Shuts down the bot gracefully.
+    Stops accepting work, drains in-flight work until settings.SHUTDOWN_TIMEOUT and cancels what is left.
+    Before that, stop_event is set and blocking work started with run_blocking() gets
+    settings.SHUTDOWN_CANCEL_TIMEOUT seconds to stop. Cancelled tasks get the same time to unwind.
+    Then flushes, checkpoints and closes the database and closes the bot.
+
+    Arguments
+    ---------
+    bot: The bot.
+    message: If given, this message is edited with the shutdown report.
+
+    Returns
+    -------
+    False without doing anything if a shutdown is already running, True otherwise.
+    """
+    global _accepting
+    if not _accepting:
+        return False
+    _accepting = False
+    start_time = time.monotonic()
+    pending = _in_flight - {asyncio.current_task()}
+    if pending:
+        drained, dropped = await asyncio.wait(pending, timeout=settings.SHUTDOWN_TIMEOUT)
+    else:
+        drained, dropped = set(), set()
+    stop_event.set()
+    if _blocking:
+        # Executor threads can't be cancelled, they stop on stop_event
+        await asyncio.wait(set(_blocking), timeout=settings.SHUTDOWN_CANCEL_TIMEOUT)
+        if _blocking:
+            logs.logger.warning(f'{len(_blocking):,} blocking tasks didn\'t stop before the database was closed.')
+    for task in dropped:
+        task.cancel()
+    if dropped:
+        # Cancelled tasks may still log errors to the database while unwinding
+        await asyncio.wait(dropped, timeout=settings.SHUTDOWN_CANCEL_TIMEOUT)
+    duration = time.monotonic() - start_time
+    report = (
+        f'Shutting down. Drained {len(drained):,} tasks, dropped {len(dropped):,} tasks '
+        f'after {duration:.1f}s.'
+    )
+    logs.logger.info(report)
+    if message is not None:
+        try:
+            await message.edit(content=report)
+        except discord.HTTPException:
+            pass
+    database.close_database()
+    await bot.close()
+    return True
+
+
+def _on_signal(bot: commands.Bot) -> None:
+    """Starts the shutdown on the first signal. Stops the event loop immediately on the second one."""
+    global _shutdown_task, _signal_count
+    _signal_count += 1
+    if _signal_count == 1:
+        _shutdown_task = asyncio.ensure_future(shutdown(bot))
+    else:
+        logs.logger.warning('Received a second shutdown signal, stopping without waiting for in-flight work.')
+        bot.loop.stop()
+
+
+def _add_signal_handlers(bot: commands.Bot) -> None:
+    """Replaces the signal handlers bot.run() installs (they stop the loop immediately) with shutdown()"""
+    try:
+        for signal_number in (signal.SIGTERM, signal.SIGINT):
+            bot.loop.add_signal_handler(signal_number, _on_signal, bot)
+    except (NotImplementedError, RuntimeError):
+        pass
+
+
+def setup(bot: commands.Bot) -> None:
+    """Registers the global command check and the SIGTERM and SIGINT handlers. Call this before bot.run()."""
+    bot.add_check(check_accepting)
+    # bot.run() installs its own signal handlers, so ours are added once the loop is running
+    bot.loop.call_soon(_add_signal_handlers, bot)
@@ -1,6 +1,8 @@
 #exceptions.py
 """Contains custom exceptions"""
 
+from discord.ext import commands
+
 
 class NoArgumentsError(ValueError):
     """Custom exception for when no arguments are passed to a function"""
@@ -8,4 +10,14 @@ class NoArgumentsError(ValueError):
 
 class NoDataFoundError(Exception):
     """Custom exception for when no data is returned from the database"""
+    pass
+
+class TransferStoppedError(Exception):
+    """Custom exception for when an export or import is stopped before it is complete"""
+    pass
+
+class ShuttingDownError(commands.CheckFailure):
+    """Custom exception for when a command is used while the bot is shutting down.
+    Is a CheckFailure, as only those are passed on to on_application_command_error when raised in a check.
+    """
     pass
\ No newline at end of file
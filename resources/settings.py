@@ -12,9 +12,18 @@ DEBUG_MODE = os.getenv('DEBUG_MODE')
 BOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DB_FILE = os.path.join(BOT_DIR, 'database/room_wizard_db.db')
 LOG_FILE = os.path.join(BOT_DIR, 'logs/discord.log')
+EXPORT_DIR = os.path.join(BOT_DIR, 'database/exports')
 
 DEV_GUILDS = [730115558766411857]
 
+# Seconds a cached room authorization decision is valid
+AUTHORIZATION_CACHE_TTL = 300
+
+# Seconds to wait for in-flight work on shutdown before it is dropped
+SHUTDOWN_TIMEOUT = 20
+# Seconds cancelled work gets to unwind before the database is closed
+SHUTDOWN_CANCEL_TIMEOUT = 5
+
 # Embed color
 EMBED_COLOR = 0x6C48A7
 DEFAULT_FOOTER = 'Just pinning things.'
\ No newline at end of file
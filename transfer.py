@@ -0,0 +1,47 @@
+# transfer.py
+"""Command line tool to export and import the database tables, e.g. to move the bot to another host.
+
+Usage:
+    python transfer.py export rooms rooms.jsonl.gz
+    python transfer.py import errors errors.csv.gz --db database/room_wizard_db.db
+
+Supported files are .jsonl and .csv, both optionally gzip compressed (.gz).
+The bot doesn't need to be stopped for either.
+"""
+
+import argparse
+import sqlite3
+import sys
+import time
+
+import database
+from resources import settings
+
+
+def print_progress(row_count: int) -> None:
+    """Prints the current row count to stderr"""
+    print(f'\r{row_count:,} rows', end='', file=sys.stderr, flush=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Export or import Room Wizard database tables.')
+    parser.add_argument('action', choices=('export', 'import'))
+    parser.add_argument('table', choices=database.TRANSFER_TABLES)
+    parser.add_argument('file', help='.jsonl, .csv, .jsonl.gz or .csv.gz file')
+    parser.add_argument('--db', default=settings.DB_FILE, help=f'Database file (default: {settings.DB_FILE})')
+    args = parser.parse_args()
+
+    function = database.export_table if args.action == 'export' else database.import_table
+    start_time = time.monotonic()
+    try:
+        row_count = function(args.table, args.file, db_file=args.db, progress=print_progress)
+    except (ValueError, OSError, sqlite3.Error) as error:
+        print(file=sys.stderr)
+        sys.exit(f'{args.action.capitalize()} failed: {error}')
+    duration = time.monotonic() - start_time
+    print(file=sys.stderr)
+    print(f'{args.action.capitalize()}ed {row_count:,} rows of {args.table} in {duration:.1f}s.')
+
+
+if __name__ == '__main__':
+    main()